@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""GeoSentinel 2.0 geo query service — radius, bounding-box and route-corridor lookups over the latest scan.
+Indexes signals and hotspots from the scanner's signals.json and reloads when a new scan is published."""
+
+import argparse
+import bisect
+import json
+import math
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from scanner_v2 import SIGNALS_FILE
+
+EARTH_KM = 6371.0088
+LEAF_SIZE = 8          # points per KD-tree leaf
+RELOAD_INTERVAL = 5    # seconds between checks for a newly published signals.json
+MAX_RESULTS = 500      # cap on items per layer in one response
+CORRIDOR_STEP_KM = 50  # minimum spacing of corridor samples, so narrow corridors don't multiply the lookups
+
+INDEX = None  # current dataset; replaced wholesale on reload so handlers never see a half-built index
+
+# ═══ Geometry (unit vectors on the sphere) ═══
+def to_xyz(lat, lng):
+    la, ln = math.radians(lat), math.radians(lng)
+    return (math.cos(la) * math.cos(ln), math.cos(la) * math.sin(ln), math.sin(la))
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+def _unit(v):
+    n = math.sqrt(_dot(v, v))
+    return (v[0] / n, v[1] / n, v[2] / n) if n > 1e-12 else None
+
+def chord_for_km(km):
+    """Straight-line distance between unit vectors that are km apart along the surface."""
+    return 2.0 if km >= math.pi * EARTH_KM else 2 * math.sin(km / (2 * EARTH_KM))
+
+def km_between(a, b):
+    chord = math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2)
+    return 2 * EARTH_KM * math.asin(min(1.0, chord / 2))
+
+def km_to_arc(p, a, b):
+    """Great-circle km from p to the minor arc a→b."""
+    n = _unit(_cross(a, b))
+    if n is None:
+        return km_between(p, a)
+    s = _dot(p, n)
+    foot = _unit((p[0] - s * n[0], p[1] - s * n[1], p[2] - s * n[2]))
+    # The foot of the perpendicular lies on the arc iff it sits between a and b going round n
+    if foot and _dot(_cross(a, foot), n) >= 0 and _dot(_cross(foot, b), n) >= 0:
+        return EARTH_KM * math.asin(min(1.0, abs(s)))
+    return min(km_between(p, a), km_between(p, b))
+
+def arc_samples(a, b, step_km):
+    """Points along the arc a→b no more than step_km apart, endpoints included."""
+    omega = math.acos(max(-1.0, min(1.0, _dot(a, b))))
+    n = max(1, math.ceil(omega * EARTH_KM / step_km))
+    if omega < 1e-9:
+        return [a]
+    out = []
+    for k in range(n + 1):
+        t = k / n
+        wa, wb = math.sin((1 - t) * omega), math.sin(t * omega)
+        out.append(_unit((wa * a[0] + wb * b[0], wa * a[1] + wb * b[1], wa * a[2] + wb * b[2])))
+    return out
+
+# ═══ KD-tree ═══
+# 3-d tree over unit vectors: radius queries compare chord lengths, so the dateline and poles need no special cases.
+def build_kdtree(pts, ids=None):
+    ids = list(range(len(pts))) if ids is None else ids
+    if len(ids) <= LEAF_SIZE:
+        return ids
+    axis = max(range(3), key=lambda k: max(pts[i][k] for i in ids) - min(pts[i][k] for i in ids))
+    ids.sort(key=lambda i: pts[i][axis])
+    mid = len(ids) // 2
+    return (axis, pts[ids[mid]][axis], build_kdtree(pts, ids[:mid]), build_kdtree(pts, ids[mid:]))
+
+def kdtree_within(tree, pts, q, r):
+    """Ids of points within chord distance r of q."""
+    out, r2, stack = [], r * r, [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            for i in node:
+                p = pts[i]
+                if (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2 <= r2:
+                    out.append(i)
+            continue
+        axis, split, lo, hi = node
+        d = q[axis] - split
+        if d <= r: stack.append(lo)
+        if d >= -r: stack.append(hi)
+    return out
+
+# ═══ Dataset ═══
+def build_layer(items, latlng, diseases, severity):
+    """Spatial index plus filter columns and pre-serialized JSON for one kind of item."""
+    coords = [latlng(x) for x in items]
+    pts = [to_xyz(lat, lng) for lat, lng in coords]
+    by_lat = sorted(range(len(items)), key=lambda i: coords[i][0])
+    return {
+        "coords": coords, "pts": pts, "tree": build_kdtree(pts),
+        "by_lat": by_lat, "lats": [coords[i][0] for i in by_lat],
+        "diseases": [set(diseases(x)) for x in items],
+        "severity": [severity(x) for x in items],
+        "json": [json.dumps(x, separators=(",", ":")).encode() for x in items],
+    }
+
+def load_index(path):
+    with open(path) as f:
+        data = json.load(f)
+    return {
+        "lastScan": data.get("lastScan"),
+        "loaded_at": time.time(),
+        "signals": build_layer(data.get("signals", []), lambda s: (s["location"]["lat"], s["location"]["lng"]),
+                               lambda s: [s["disease"]], lambda s: s["severity"]),
+        "hotspots": build_layer(data.get("hotspots", []), lambda h: (h["lat"], h["lng"]),
+                                lambda h: h["diseases"], lambda h: h["max_severity"]),
+    }
+
+def watch(path):
+    """Reload INDEX whenever the signals file changes; a half-written or bad file keeps the previous index."""
+    global INDEX
+    last = None
+    while True:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if mtime != last:
+                INDEX = load_index(path)
+                last = mtime
+                print(f"📥 Loaded scan {INDEX['lastScan']} — {len(INDEX['signals']['pts'])} signals, "
+                      f"{len(INDEX['hotspots']['pts'])} hotspots", file=sys.stderr)
+        except Exception as e:
+            print(f"  [!] Reload failed: {e}", file=sys.stderr)
+        time.sleep(RELOAD_INTERVAL)
+
+# ═══ Queries ═══
+# Each returns candidate ids mapped to a distance in km (None for bounding boxes); filters are applied afterwards.
+def radius_candidates(layer, lat, lng, km):
+    q = to_xyz(lat, lng)
+    return {i: km_between(layer["pts"][i], q) for i in kdtree_within(layer["tree"], layer["pts"], q, chord_for_km(km))}
+
+def bbox_candidates(layer, south, west, north, east):
+    lo, hi = bisect.bisect_left(layer["lats"], south), bisect.bisect_right(layer["lats"], north)
+    wraps = west > east  # box crosses the antimeridian
+    out = {}
+    for i in layer["by_lat"][lo:hi]:
+        lng = layer["coords"][i][1]
+        if (west <= lng or lng <= east) if wraps else (west <= lng <= east):
+            out[i] = None
+    return out
+
+def corridor_candidates(layer, path, km):
+    """Items within km of a polyline: radius queries around samples spaced ≤ step apart, then exact arc distance."""
+    verts = [to_xyz(lat, lng) for lat, lng in path]
+    step = max(km, CORRIDOR_STEP_KM)
+    r = chord_for_km(km + step / 2)  # any point within km of the arc is within km + step/2 of a sample
+    out = {}
+    for a, b in zip(verts, verts[1:]) if len(verts) > 1 else [(verts[0], verts[0])]:
+        for sample in arc_samples(a, b, step):
+            for i in kdtree_within(layer["tree"], layer["pts"], sample, r):
+                d = km_to_arc(layer["pts"][i], a, b)
+                if d <= km and d < out.get(i, math.inf):
+                    out[i] = d
+    return out
+
+def render(layer, found, diseases, min_severity, limit):
+    keep = [(d, i) for i, d in found.items()
+            if layer["severity"][i] >= min_severity and (not diseases or layer["diseases"][i] & diseases)]
+    keep.sort(key=lambda x: (x[0] is None, x[0] or 0, -layer["severity"][x[1]]))
+    parts = [b'{"distance_km":%s,"item":%s}' % (b"null" if d is None else b"%.1f" % d, layer["json"][i])
+             for d, i in keep[:limit]]
+    return len(keep), b"[" + b",".join(parts) + b"]"
+
+def _floats(qs, *names):
+    try:
+        return [float(qs[n][0]) for n in names]
+    except (KeyError, ValueError):
+        raise ValueError("required numeric parameters: " + ", ".join(names))
+
+def run_query(index, route, qs):
+    """Answer /radius, /bbox or /corridor against index; raises ValueError for bad parameters."""
+    if route == "/radius":
+        lat, lng, km = _floats(qs, "lat", "lng", "km")
+        if not km >= 0:
+            raise ValueError("km must be non-negative")
+        find = lambda layer: radius_candidates(layer, lat, lng, km)
+    elif route == "/bbox":
+        south, west, north, east = _floats(qs, "south", "west", "north", "east")
+        find = lambda layer: bbox_candidates(layer, south, west, north, east)
+    elif route == "/corridor":
+        (km,) = _floats(qs, "km")
+        if not km > 0:
+            raise ValueError("km must be positive")
+        try:
+            path = [tuple(float(v) for v in pt.split(",")) for pt in qs["path"][0].split(";") if pt]
+        except (KeyError, ValueError):
+            path = []
+        if not path or any(len(p) != 2 for p in path):
+            raise ValueError("path must be 'lat,lng;lat,lng;...'")
+        find = lambda layer: corridor_candidates(layer, path, km)
+    else:
+        raise LookupError(route)
+    diseases = {d.strip().lower() for d in qs.get("disease", [""])[0].split(",") if d.strip()}
+    min_severity = float(qs.get("min_severity", ["0"])[0])
+    limit = min(int(qs.get("limit", [MAX_RESULTS])[0]), MAX_RESULTS)
+    if limit < 0:
+        raise ValueError("limit must be non-negative")
+    n_sig, sigs = render(index["signals"], find(index["signals"]), diseases, min_severity, limit)
+    n_hot, hots = render(index["hotspots"], find(index["hotspots"]), diseases, min_severity, limit)
+    return b'{"lastScan":%s,"total":{"signals":%d,"hotspots":%d},"signals":%s,"hotspots":%s}' % (
+        json.dumps(index["lastScan"]).encode(), n_sig, n_hot, sigs, hots)
+
+# ═══ HTTP ═══
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    disable_nagle_algorithm = True  # headers and body go out as separate small writes
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        index = INDEX
+        if index is None:
+            return self._send(503, b'{"error":"no scan loaded yet"}')
+        if url.path == "/health":
+            return self._send(200, json.dumps({
+                "lastScan": index["lastScan"], "loaded_at": index["loaded_at"],
+                "signals": len(index["signals"]["pts"]), "hotspots": len(index["hotspots"]["pts"]),
+            }).encode())
+        try:
+            self._send(200, run_query(index, url.path, parse_qs(url.query)))
+        except LookupError:
+            self._send(404, b'{"error":"unknown endpoint; use /radius, /bbox, /corridor or /health"}')
+        except ValueError as e:
+            self._send(400, json.dumps({"error": str(e)}).encode())
+
+    def _send(self, code, body):
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="GeoSentinel 2.0 geo query service")
+    ap.add_argument("--file", default=SIGNALS_FILE, help="signals.json to serve (default: the scanner's output)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args(argv)
+    threading.Thread(target=watch, args=(args.file,), daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), QueryHandler)
+    print(f"🗺️  GeoSentinel geo query service on http://{args.host}:{args.port}", file=sys.stderr)
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -12,12 +12,25 @@ import urllib.request
 import urllib.parse
 import hashlib
 import gzip
+import random
+import urllib.error
+import email.utils
+import math
+import bisect
+import time
+import argparse
+import cProfile
+import pstats
+import tracemalloc
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 
 DIR = os.path.dirname(os.path.abspath(__file__))
 SIGNALS_FILE = os.path.join(DIR, "terminal", "signals.json")
 HISTORY_FILE = os.path.join(DIR, "signal_history.json")
+REPLAY_FILE = os.path.join(DIR, "replay", "signals.json")  # default output of replays, which never publish
 
 # ═══════════════════════════════════════════
 # GEOCODING DATABASE — City + Country level
@@ -310,7 +323,9 @@ def get_brave_key():
     except:
         return os.environ.get("BRAVE_API_KEY", "")
 
-def search_web(query, count=8):
+# search_web, search_bird and fetch_who raise on upstream failure; guarded_fetch handles retries and breakers.
+
+def search_web(query, count=8, timeout=15):
     api_key = get_brave_key()
     if not api_key:
         return []
@@ -318,42 +333,31 @@ def search_web(query, count=8):
     url = "https://api.search.brave.com/res/v1/web/search?" + params
     headers = {"Accept": "application/json", "Accept-Encoding": "gzip", "X-Subscription-Token": api_key}
     req = urllib.request.Request(url, headers=headers)
-    try:
-        with urllib.request.urlopen(req, timeout=15) as r:
-            raw = r.read()
-            try:
-                data = json.loads(gzip.decompress(raw))
-            except:
-                data = json.loads(raw)
-        return [{"title": i.get("title",""), "url": i.get("url",""), 
-                 "description": i.get("description",""), "published": i.get("age","")}
-                for i in data.get("web",{}).get("results",[])]
-    except Exception as e:
-        print(f"  [!] Search error: {e}", file=sys.stderr)
-        return []
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        raw = r.read()
+        try:
+            data = json.loads(gzip.decompress(raw))
+        except:
+            data = json.loads(raw)
+    return [{"title": i.get("title",""), "url": i.get("url",""), 
+             "description": i.get("description",""), "published": i.get("age","")}
+            for i in data.get("web",{}).get("results",[])]
 
-def search_bird(query, count=20):
-    try:
-        result = subprocess.run(
-            ["bird", "search", query, "--count", str(count), "--json"],
-            capture_output=True, text=True, timeout=30
-        )
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            return data if isinstance(data, list) else []
-    except Exception as e:
-        print(f"  [!] Bird error: {e}", file=sys.stderr)
-    return []
+def search_bird(query, count=20, timeout=30):
+    result = subprocess.run(
+        ["bird", "search", query, "--count", str(count), "--json"],
+        capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        raise RuntimeError("bird exited %d: %s" % (result.returncode, result.stderr.strip()[:200]))
+    data = json.loads(result.stdout)
+    return data if isinstance(data, list) else []
 
-def fetch_who():
+def fetch_who(timeout=15):
     url = "https://www.who.int/api/hubs/diseaseoutbreaknews?$orderby=PublicationDate%20desc&$top=30"
-    try:
-        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=15) as r:
-            return json.loads(r.read()).get("value", [])
-    except Exception as e:
-        print(f"  [!] WHO error: {e}", file=sys.stderr)
-        return []
+    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        return json.loads(r.read()).get("value", [])
 
 def fetch_google_trends():
     """Get Google Trends data for disease + travel keywords."""
@@ -407,6 +411,118 @@ def fetch_google_trends():
         print(f"  [!] Trends error: {e}", file=sys.stderr)
     return signals
 
+# ═══ Fetch resilience ═══
+FETCH_DEADLINE_SEC = 300                               # wall-clock budget for all guarded fetches in one scan
+FETCH_SHARE = {"who": 0.1, "brave": 0.6, "bird": 0.3}  # split of that budget per upstream
+FETCH_TIMEOUT = {"who": 15, "brave": 15, "bird": 30}   # per-call ceiling, cut to what the source has left
+FETCH_INTERVAL = {"brave": 1.1}                        # minimum seconds between calls (rate limit)
+FETCH_RETRIES = 2                                      # extra attempts after a retryable error
+BACKOFF_BASE = 0.5                                     # first retry waits ~this long, doubling, ±50% jitter (unless a 429 says Retry-After)
+BREAKER_THRESHOLD = 3                                  # consecutive failed calls (retries exhausted) that open a source's breaker
+BREAKER_COOLDOWN = 60                                  # seconds open before a single half-open probe
+
+def new_fetch_guard(deadline=FETCH_DEADLINE_SEC, shards=1):
+    """Fetch guard for one process. With N shards scanning in parallel, each gets 1/N of every source's budget
+    and N× its rate-limit interval, so the shards together stay within the limits of a single scan."""
+    now = time.monotonic()
+    return {"start": now, "deadline": now + deadline, "sources": {
+        src: {"state": "closed", "failures": 0, "opened_at": None, "last_call": None, "retry_at": 0.0,
+              "budget": deadline * share / shards, "interval": FETCH_INTERVAL.get(src, 0) * shards,
+              "spent": 0.0, "out_of_budget": False,
+              "calls": 0, "errors": 0, "retries": 0, "skipped": 0, "transitions": []}
+        for src, share in FETCH_SHARE.items()}}
+
+def _set_breaker(guard, src, state, reason):
+    b = guard["sources"][src]
+    if state == "open":
+        b["opened_at"] = time.monotonic()
+    if b["state"] != state:
+        print(f"  [!] {src} breaker {b['state']} → {state} ({reason})", file=sys.stderr)
+        b["transitions"].append({"at_sec": round(time.monotonic() - guard["start"], 1), "to": state, "reason": reason})
+        b["state"] = state
+
+def _retryable(e):
+    if isinstance(e, urllib.error.HTTPError):
+        return e.code == 429 or e.code >= 500
+    return not isinstance(e, FileNotFoundError)
+
+def _retry_after(e):
+    """Seconds a 429 response asks us to wait (Retry-After as delta-seconds or an HTTP date), else 0."""
+    if not (isinstance(e, urllib.error.HTTPError) and e.code == 429 and e.headers):
+        return 0.0
+    value = e.headers.get("Retry-After", "")
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (email.utils.parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return 0.0
+
+def guarded_fetch(guard, src, fn, *args, **kwargs):
+    """Call an upstream fetcher under its source's breaker, deadline share, rate limit and retry policy.
+    Returns None — not [], which is an empty answer — when the call was skipped (breaker open, budget spent)
+    or failed after its retries.
+    The breaker counts calls, not attempts: a call is one failure only once its retries are exhausted."""
+    b = guard["sources"][src]
+    if b["state"] == "open":
+        if time.monotonic() - b["opened_at"] < BREAKER_COOLDOWN:
+            b["skipped"] += 1
+            return None
+        _set_breaker(guard, src, "half-open", "cooldown elapsed")
+    attempts = 1 if b["state"] == "half-open" else 1 + FETCH_RETRIES
+    hinted = False
+    for attempt in range(attempts):
+        t0 = time.monotonic()
+        wait = max(0.0, b["last_call"] + b["interval"] - t0) if b["last_call"] else 0.0
+        wait = max(wait, b["retry_at"] - t0)
+        if attempt and not hinted:
+            wait = max(wait, BACKOFF_BASE * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        remaining = min(b["budget"] - b["spent"], guard["deadline"] - t0) - wait
+        if remaining < 1:
+            if not b["out_of_budget"]:
+                print(f"  [!] {src} fetch budget spent — skipping remaining calls", file=sys.stderr)
+                b["out_of_budget"] = True
+            b["skipped"] += 1
+            return None
+        if wait:
+            time.sleep(wait)
+        b["calls"] += 1
+        b["retries"] += 1 if attempt else 0
+        try:
+            result = fn(*args, timeout=min(FETCH_TIMEOUT[src], remaining), **kwargs)
+        except Exception as e:
+            b["errors"] += 1
+            print(f"  [!] {src} error: {e}", file=sys.stderr)
+            delay = _retry_after(e)
+            hinted = delay > 0
+            if hinted:
+                b["retry_at"] = time.monotonic() + delay
+            if attempt + 1 < attempts and _retryable(e):
+                continue
+            b["failures"] += 1
+            if b["state"] == "half-open":
+                _set_breaker(guard, src, "open", "probe failed")
+            elif b["failures"] >= BREAKER_THRESHOLD:
+                _set_breaker(guard, src, "open", "%d consecutive failed calls" % b["failures"])
+            return None
+        finally:
+            b["last_call"] = time.monotonic()
+            b["spent"] += b["last_call"] - t0
+        b["failures"] = 0
+        if b["state"] == "half-open":
+            _set_breaker(guard, src, "closed", "probe succeeded")
+        return result
+    return None
+
+def fetch_stats(guard):
+    """Per-source breaker state, call counts and time spent, for the scan stats."""
+    return {src: {"state": b["state"], "calls": b["calls"], "errors": b["errors"], "retries": b["retries"],
+                  "skipped": b["skipped"], "spent_sec": round(b["spent"], 1), "budget_sec": round(b["budget"], 1),
+                  "transitions": b["transitions"]}
+            for src, b in guard["sources"].items()}
+
 # ═══ Processing ═══
 
 def process_who(items):
@@ -523,12 +639,15 @@ def process_reddit(results):
     return signals
 
 # ═══ Deduplication ═══
+def dedup_key(s):
+    return (s["location"]["iso"], s["disease"], s["source"])
+
 def deduplicate(signals):
     """Remove near-duplicate signals using location+disease clustering."""
     seen = {}
     unique = []
     for s in signals:
-        key = (s["location"]["iso"], s["disease"], s["source"])
+        key = dedup_key(s)
         if key in seen:
             existing = seen[key]
             if s["severity"] > existing["severity"] or s["confidence"] > existing["confidence"]:
@@ -642,124 +761,558 @@ def compute_hotspots(signals):
         })
     return hotspots
 
-# ═══ Main scan ═══
-def run_scan():
-    import time
-    t0 = time.time()
-    
-    print("=" * 60)
-    print("🛰️  GeoSentinel 2.0 Scanner v2 — Full Spectrum Scan")
-    print("=" * 60)
-    
-    all_signals = []
-    
-    # 1. WHO
-    print("\n📡 [1/5] WHO Disease Outbreak News...")
-    who = fetch_who()
-    print(f"   → {len(who)} items")
-    all_signals.extend(process_who(who))
-    
-    # 2. News (Brave)
-    news_queries = [
-        "disease outbreak 2026 travel",
-        "dengue outbreak cases 2026",
-        "cholera outbreak 2026",
-        "malaria outbreak surge 2026",
-        "avian flu H5N1 outbreak 2026",
-        "measles outbreak cases 2026",
-        "mpox cases outbreak 2026",
-        "travelers sick returning illness",
-        "travel health warning disease",
-        "ebola marburg outbreak Africa 2026",
-        "typhoid outbreak travel",
-        "meningitis outbreak 2026",
-        "nipah virus outbreak",
-        "yellow fever outbreak 2026",
-        "lassa fever outbreak",
-        "polio cases outbreak",
-    ]
-    print(f"\n🔍 [2/5] News search ({len(news_queries)} queries)...")
-    for i, q in enumerate(news_queries):
-        results = search_web(q, count=5)
-        sigs = process_news(results, q)
-        if sigs:
-            print(f"   [{i+1}/{len(news_queries)}] '{q}' → {len(sigs)} signals")
-        all_signals.extend(sigs)
-        time.sleep(1.1)  # rate limit
-    
-    # 3. Twitter
-    twitter_queries = [
-        "sick after traveling fever",
-        "got malaria travel Africa",
-        "dengue travel sick hospital",
-        "food poisoning travel diarrhea",
-        "outbreak warning travel alert",
-        "came back sick from trip",
-        "travel illness hospitalized",
-        "cholera outbreak travel warning",
-        "tourist sick hospital tropical",
-        "traveler quarantine infection",
-    ]
-    print(f"\n🐦 [3/5] Twitter/X ({len(twitter_queries)} queries)...")
-    for q in twitter_queries:
-        tweets = search_bird(q, count=15)
-        sigs = process_tweets(tweets)
-        if sigs:
-            print(f"   '{q}' → {len(sigs)} signals")
-        all_signals.extend(sigs)
+# ═══ Query planner ═══
+NEWS_QUERIES = [
+    "disease outbreak 2026 travel",
+    "dengue outbreak cases 2026",
+    "cholera outbreak 2026",
+    "malaria outbreak surge 2026",
+    "avian flu H5N1 outbreak 2026",
+    "measles outbreak cases 2026",
+    "mpox cases outbreak 2026",
+    "travelers sick returning illness",
+    "travel health warning disease",
+    "ebola marburg outbreak Africa 2026",
+    "typhoid outbreak travel",
+    "meningitis outbreak 2026",
+    "nipah virus outbreak",
+    "yellow fever outbreak 2026",
+    "lassa fever outbreak",
+    "polio cases outbreak",
+]
+
+TWITTER_QUERIES = [
+    "sick after traveling fever",
+    "got malaria travel Africa",
+    "dengue travel sick hospital",
+    "food poisoning travel diarrhea",
+    "outbreak warning travel alert",
+    "came back sick from trip",
+    "travel illness hospitalized",
+    "cholera outbreak travel warning",
+    "tourist sick hospital tropical",
+    "traveler quarantine infection",
+]
+
+REDDIT_QUERIES = [
+    "site:reddit.com travel sick illness trip",
+    "site:reddit.com got dengue traveling",
+    "site:reddit.com malaria travel experience",
+    "site:reddit.com food poisoning travel country",
+    "site:reddit.com travel health warning outbreak",
+    "site:reddit.com sick after vacation tropical",
+]
+
+QUERY_BUDGET = {"brave": 16, "bird": 8}  # API calls per scan; news + reddit share the Brave budget
+QUERY_EXPLORE = 0.25                     # share of each budget reserved for the least recently run queries
+QUERY_DECAY = 0.3                        # weight of the latest run in a query's moving yield
+HOTSPOT_BOOST = 1.0                      # score bonus for queries naming an active hotspot disease or place
+
+def query_key(source, query):
+    return source + "|" + query
+
+def load_previous_output():
+    if os.path.exists(SIGNALS_FILE):
+        try:
+            with open(SIGNALS_FILE) as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"  [!] Previous output unreadable: {e}", file=sys.stderr)
+    return {}
+
+def hotspot_terms(hotspots):
+    """Diseases, countries and regions of CRITICAL/HIGH hotspots, lowercased."""
+    terms = set()
+    for h in hotspots:
+        if h.get("threat_level") in ("CRITICAL", "HIGH"):
+            terms.update(d for d in h.get("diseases", []) if d != "unknown")
+            terms.add(h["name"].lower())
+            if h.get("region"): terms.add(h["region"].lower())
+    return terms
+
+def plan_queries(pool, budget, query_stats, hot_terms):
+    """Choose which (source, query) pairs to run within budget.
+    UCB on each query's moving yield fills most slots; the rest go to the least recently run queries."""
+    if budget >= len(pool):
+        return list(pool)
+    stats = {item: query_stats.get(query_key(*item), {}) for item in pool}
+    total_runs = max(2, sum(st.get("runs", 0) for st in stats.values()))
+    def score(item):
+        st = stats[item]
+        if not st.get("runs"):
+            return float("inf")
+        boost = HOTSPOT_BOOST if any(t in item[1].lower() for t in hot_terms) else 0
+        return st["yield"] + boost + math.sqrt(2 * math.log(total_runs) / st["runs"])
+    n_explore = min(budget, max(1, int(budget * QUERY_EXPLORE)))
+    ranked = sorted(pool, key=score, reverse=True)
+    chosen = ranked[:budget - n_explore]
+    chosen += sorted(ranked[budget - n_explore:], key=lambda it: stats[it].get("last_run", ""))[:n_explore]
+    return [item for item in pool if item in chosen]
+
+def update_query_stats(query_stats, produced, signals, prev_ids):
+    """Fold this scan's yield into each run query's stats.
+    Each surviving signal is worth 1, +1 if new since the last scan, +1 if anomalous. Its worth is split evenly
+    among every query that found its dedup key, so credit doesn't depend on which query's copy dedup kept."""
+    survivors = {dedup_key(s): s for s in signals}
+    found = {key: {dedup_key(s) for s in sigs} & survivors.keys() for key, sigs in produced.items()}
+    finders = defaultdict(int)
+    for keys in found.values():
+        for k in keys:
+            finders[k] += 1
+    now = datetime.now(timezone.utc).isoformat()
+    for key, sigs in produced.items():
+        kept = [survivors[k] for k in found[key]]
+        new = sum(1 for s in kept if s["id"] not in prev_ids)
+        anomalies = sum(1 for s in kept if s.get("anomaly"))
+        reward = sum((1 + (s["id"] not in prev_ids) + bool(s.get("anomaly"))) / finders[dedup_key(s)] for s in kept)
+        st = query_stats.setdefault(key, {"runs": 0, "yield": 0.0})
+        st["yield"] = round(reward if not st["runs"] else (1 - QUERY_DECAY) * st["yield"] + QUERY_DECAY * reward, 3)
+        st["runs"] += 1
+        st["last"] = {"raw": len(sigs), "survivors": len(kept), "new": new, "anomalies": anomalies}
+        st["last_run"] = now
+    return query_stats
+
+# ═══ Filter indexes ═══
+def severity_bucket(sev):
+    return "critical" if sev >= 8 else "high" if sev >= 6 else "moderate" if sev >= 4 else "low"
+
+def build_indexes(signals):
+    """Inverted indexes of signal positions, intersected by the dashboard's filter worker."""
+    idx = {k: defaultdict(list) for k in ("source", "category", "severity", "region", "disease")}
+    traveler = []
+    for i, s in enumerate(signals):
+        idx["source"][s["source"]].append(i)
+        idx["category"][s["category"]].append(i)
+        idx["severity"][severity_bucket(s["severity"])].append(i)
+        idx["region"][s["location"].get("region") or "Other"].append(i)
+        idx["disease"][s["disease"]].append(i)
+        if s.get("is_traveler"): traveler.append(i)
+    out = {k: dict(v) for k, v in idx.items()}
+    out["traveler"] = traveler
+    return out
+
+def compute_region_rollups(hotspots):
+    """Per-region summary of hotspots for the dashboard's Regions tab."""
+    regions = {}
+    for h in hotspots:
+        r = h.get("region") or "Other"
+        if r not in regions:
+            regions[r] = {"name": r, "countries": [], "max_severity": 0, "signals": 0, "diseases": set()}
+        g = regions[r]
+        g["countries"].append({"iso": h["iso"], "name": h["name"], "lat": h["lat"], "lng": h["lng"], "signals": h["signals"]})
+        g["max_severity"] = max(g["max_severity"], h["max_severity"])
+        g["signals"] += h["signals"]
+        g["diseases"].update(h["diseases"])
+    return [dict(g, diseases=sorted(g["diseases"])) for g in sorted(regions.values(), key=lambda x: -x["max_severity"])]
+
+# ═══ Alert rules ═══
+ALERT_RULES_FILE = os.path.join(DIR, "alert_rules.json")
+ALERTS_DIR = os.path.join(DIR, "alerts")         # outbox/<subscriber>.jsonl; dedup state lives in the history
+ALERT_DEDUP_DAYS = 14                            # how long a sent alert suppresses repeats
+THREAT_RANK = {"LOW": 0, "MODERATE": 1, "HIGH": 2, "CRITICAL": 3}
+# rule field → index dimension, most selective first; a rule is bucketed under the first one it constrains
+RULE_DIMS = (("iso", "iso"), ("diseases", "disease"), ("categories", "category"), ("regions", "region"))
+
+ALERT_EVENTS = ("signal", "hotspot")
+
+def rule_problem(r):
+    """Why a raw rule can't be used, or None if it is valid."""
+    if not isinstance(r, dict):
+        return "not an object"
+    for field in ("id", "subscriber"):
+        if not isinstance(r.get(field), str) or not r[field]:
+            return "missing '%s'" % field
+    for field in [f for f, _ in RULE_DIMS] + ["events"]:
+        if field in r and not (isinstance(r[field], list) and all(isinstance(v, str) for v in r[field])):
+            return "'%s' must be a list of strings" % field
+    if any(e not in ALERT_EVENTS for e in r.get("events", [])):
+        return "'events' may only contain " + ", ".join(ALERT_EVENTS)
+    if isinstance(r.get("min_severity", 0), bool) or not isinstance(r.get("min_severity", 0), (int, float)):
+        return "'min_severity' must be a number"
+    if not isinstance(r.get("anomaly", False), bool):
+        return "'anomaly' must be true or false"
+    return None
+
+def load_alert_rules(path=ALERT_RULES_FILE):
+    """Rules from alert_rules.json, with list fields normalized to sets (ISO codes upper-case, the rest lower).
+    An unreadable file yields no rules and an invalid rule is skipped, each with a warning."""
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"  [!] Alert rules unreadable ({path}): {e}", file=sys.stderr)
+        return []
+    raw = raw.get("rules", []) if isinstance(raw, dict) else raw
+    if not isinstance(raw, list):
+        print(f"  [!] Alert rules must be a list or {{\"rules\": [...]}} ({path})", file=sys.stderr)
+        return []
+    rules = []
+    for n, r in enumerate(raw):
+        problem = rule_problem(r)
+        if problem:
+            print(f"  [!] Skipping alert rule #{n} ({r.get('id', '?') if isinstance(r, dict) else '?'}): {problem}", file=sys.stderr)
+            continue
+        rule = dict(r)
+        for field, _ in RULE_DIMS:
+            if rule.get(field):
+                rule[field] = {v.upper() if field == "iso" else v.lower() for v in rule[field]}
+        rule["min_severity"] = float(rule.get("min_severity", 0))
+        rule["events"] = set(rule.get("events", ALERT_EVENTS))
+        rules.append(rule)
+    return rules
+
+def build_rule_index(rules):
+    """(dimension, value) → (ascending min_severity list, rules); unconstrained rules go under ("*", None).
+    A lookup only bisects the buckets an event's own keys name, so cost follows the relevant rules, not all rules."""
+    buckets = defaultdict(list)
+    for n, r in enumerate(rules):
+        field, dim = next(((f, d) for f, d in RULE_DIMS if r.get(f)), (None, "*"))
+        for value in (r[field] if field else [None]):
+            buckets[(dim, value)].append((r["min_severity"], n, r))
+    index = {}
+    for key, entries in buckets.items():
+        entries.sort(key=lambda e: (e[0], e[1]))
+        index[key] = ([e[0] for e in entries], [e[2] for e in entries])
+    return index
+
+def rule_matches(rule, ev):
+    return (ev["kind"] in rule["events"]
+            and ev["severity"] >= rule["min_severity"]
+            and (not rule.get("anomaly") or ev["anomaly"])
+            and (not rule.get("iso") or ev["iso"] in rule["iso"])
+            and (not rule.get("regions") or ev["region"] in rule["regions"])
+            and (not rule.get("diseases") or bool(ev["diseases"] & rule["diseases"]))
+            and (not rule.get("categories") or bool(ev["categories"] & rule["categories"])))
+
+def match_rules(index, ev):
+    keys = [("iso", ev["iso"]), ("region", ev["region"]), ("*", None)]
+    keys += [("disease", d) for d in ev["diseases"]] + [("category", c) for c in ev["categories"]]
+    matched, seen = [], set()
+    for key in keys:
+        if key not in index:
+            continue
+        sevs, rules = index[key]
+        for r in rules[:bisect.bisect_right(sevs, ev["severity"])]:
+            if id(r) not in seen and rule_matches(r, ev):
+                seen.add(id(r))
+                matched.append(r)
+    return matched
+
+def alert_events(signals, hotspots, previous):
+    """New signals (not in the previous output) and hotspots that appeared, escalated or turned anomalous."""
+    prev_ids = {s["id"] for s in previous.get("signals", [])}
+    prev_hot = {h["iso"]: h for h in previous.get("hotspots", [])}
+    events = []
+    for s in signals:
+        if s["id"] not in prev_ids:
+            events.append({"kind": "signal", "key": "signal:" + s["id"], "change": "new", "item": s,
+                           "iso": s["location"]["iso"], "region": s["location"].get("region", "").lower(),
+                           "diseases": {s["disease"]}, "categories": {s["category"]},
+                           "severity": s["severity"], "anomaly": bool(s.get("anomaly"))})
+    for h in hotspots:
+        old = prev_hot.get(h["iso"])
+        if old is None:
+            change = "new"
+        elif THREAT_RANK[h["threat_level"]] > THREAT_RANK.get(old.get("threat_level"), 0):
+            change = "escalated"
+        elif h["has_anomaly"] and not old.get("has_anomaly"):
+            change = "anomaly"
+        else:
+            continue
+        events.append({"kind": "hotspot", "key": "hotspot:%s:%s:%s" % (h["iso"], h["threat_level"], change),
+                       "change": change, "item": h, "iso": h["iso"], "region": h.get("region", "").lower(),
+                       "diseases": set(h["diseases"]),
+                       "categories": {DISEASES[d]["cat"] for d in h["diseases"] if d in DISEASES},
+                       "severity": h["max_severity"], "anomaly": h["has_anomaly"]})
+    return events
+
+def dispatch_alerts(signals, hotspots, previous, scan_time, history, rules=None, alerts_dir=ALERTS_DIR):
+    """Match this scan's events against the alert rules and append new alerts to each subscriber's outbox.
+    An alert already sent for the same subscriber, rule and event within ALERT_DEDUP_DAYS is skipped.
+    Sent alerts are kept in history["alerts_sent"] as hashed keys, so dedup survives wherever the history is
+    committed, without naming subscribers in it."""
+    rules = load_alert_rules() if rules is None else rules
+    if not rules:
+        return None
+    index = build_rule_index(rules)
+    now = datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=ALERT_DEDUP_DAYS)).isoformat()
+    sent = {k: t for k, t in history.get("alerts_sent", {}).items() if t >= cutoff}
     
-    # 4. Reddit (via web search)
-    reddit_queries = [
-        "site:reddit.com travel sick illness trip",
-        "site:reddit.com got dengue traveling",
-        "site:reddit.com malaria travel experience",
-        "site:reddit.com food poisoning travel country",
-        "site:reddit.com travel health warning outbreak",
-        "site:reddit.com sick after vacation tropical",
-    ]
-    print(f"\n💬 [4/5] Reddit ({len(reddit_queries)} queries)...")
-    for q in reddit_queries:
-        results = search_web(q, count=5)
-        sigs = process_reddit(results)
-        if sigs:
-            print(f"   '{q}' → {len(sigs)} signals")
-        all_signals.extend(sigs)
-        time.sleep(1.1)
+    outbox, matched = defaultdict(list), 0
+    for ev in alert_events(signals, hotspots, previous):
+        for r in match_rules(index, ev):
+            matched += 1
+            key = make_id("%s|%s|%s" % (r["subscriber"], r["id"], ev["key"]))
+            if key in sent:
+                continue
+            sent[key] = now.isoformat()
+            outbox[r["subscriber"]].append({"rule": r["id"], "event": ev["kind"], "change": ev["change"],
+                                            "scan": scan_time, "item": ev["item"]})
     
-    # 5. Google Trends
-    print("\n📈 [5/5] Google Trends...")
-    trend_signals = fetch_google_trends()
-    print(f"   → {len(trend_signals)} signals")
-    all_signals.extend(trend_signals)
+    os.makedirs(os.path.join(alerts_dir, "outbox"), exist_ok=True)
+    for subscriber, alerts in outbox.items():
+        name = re.sub(r"[^\w.-]", "_", subscriber)
+        with open(os.path.join(alerts_dir, "outbox", name + ".jsonl"), "a") as f:
+            f.writelines(json.dumps(a) + "\n" for a in alerts)
+    history["alerts_sent"] = sent
+    return {"rules": len(rules), "matched": matched, "sent": sum(len(a) for a in outbox.values()), "subscribers": len(outbox)}
+
+# ═══ Profiling ═══
+PROFILE = None          # per-stage accumulators while --profile is active
+PROFILE_FRAMES = 8      # traceback depth kept by tracemalloc
+PROFILE_MIN_SEC = 1e-6  # collapsed-stack paths below this are pruned
+
+def start_profile(top_n=25):
+    global PROFILE
+    tracemalloc.start(PROFILE_FRAMES)
+    PROFILE = {"stages": {}, "profilers": {}, "merged": defaultdict(list), "alloc": defaultdict(lambda: [0, 0]), "top_n": top_n}
+
+@contextmanager
+def stage(name):
+    """Attribute CPU time, wall time and allocations inside the block to a named stage.
+    No-op unless --profile is active; repeated entries (one per query) accumulate.
+    Traces are cleared on entry, so memory figures cover only what the stage itself allocates."""
+    if PROFILE is None:
+        yield
+        return
+    st = PROFILE["stages"].setdefault(name, {"calls": 0, "wall_sec": 0.0, "cpu_sec": 0.0, "peak_kb": 0.0, "net_kb": 0.0})
+    prof = PROFILE["profilers"].setdefault(name, cProfile.Profile())
+    tracemalloc.clear_traces()
+    w0, c0 = time.perf_counter(), time.process_time()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        st["wall_sec"] += time.perf_counter() - w0
+        st["cpu_sec"] += time.process_time() - c0
+        cur, peak = tracemalloc.get_traced_memory()
+        st["calls"] += 1
+        st["peak_kb"] = max(st["peak_kb"], peak / 1024)
+        st["net_kb"] += cur / 1024
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        for stat in snapshot.statistics("traceback"):
+            site = PROFILE["alloc"][(name, str(stat.traceback[-1]), "\n".join(stat.traceback.format()))]
+            site[0] += stat.size
+            site[1] += stat.count
+
+def profile_snapshot():
+    """This process's stage data in picklable form, for a worker to hand back to the parent; stops profiling."""
+    global PROFILE
+    snap = {"stages": PROFILE["stages"], "alloc": dict(PROFILE["alloc"]),
+            "stats": {name: pstats.Stats(prof).stats for name, prof in PROFILE["profilers"].items()}}
+    tracemalloc.stop()
+    PROFILE = None
+    return snap
+
+def merge_profile(snap):
+    """Fold a worker's profile_snapshot() into this process's stages; wall and CPU time add up across workers."""
+    for name, st in snap["stages"].items():
+        m = PROFILE["stages"].setdefault(name, {"calls": 0, "wall_sec": 0.0, "cpu_sec": 0.0, "peak_kb": 0.0, "net_kb": 0.0})
+        for k in ("calls", "wall_sec", "cpu_sec", "net_kb"):
+            m[k] += st[k]
+        m["peak_kb"] = max(m["peak_kb"], st["peak_kb"])
+    for site, (size, count) in snap["alloc"].items():
+        PROFILE["alloc"][site][0] += size
+        PROFILE["alloc"][site][1] += count
+    for name, stats in snap["stats"].items():
+        PROFILE["merged"][name].append(stats)
+
+def stage_stats(name):
+    """pstats for one stage: this process's profiler plus the raw stats merged in from workers."""
+    st = pstats.Stats()
+    for raw in PROFILE["merged"].get(name, []):
+        part = pstats.Stats()
+        part.stats = raw
+        part.get_top_level_stats()
+        st.add(part)
+    if name in PROFILE["profilers"]:
+        st.add(PROFILE["profilers"][name])
+    return st
+
+def profiler_frame(func):
+    """The profiler's own frames — contextlib plumbing, stage() itself and Profile.disable — as pstats keys."""
+    file, _, fn = func
+    return (os.path.basename(file) == "contextlib.py" or "_lsprof.Profiler" in fn
+            or (fn == "stage" and os.path.basename(file) == os.path.basename(__file__)))
+
+def collapsed_stacks(name, st):
+    """Flatten a stage's cProfile call graph into collapsed-stack lines (µs) rooted at the stage name.
+    cProfile only keeps caller→callee edges, so each edge's share of a function's time is pushed down the graph."""
+    stats = st.stats
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+    lines = defaultdict(float)
+    def label(func):
+        return "%s:%d:%s" % (os.path.basename(func[0]), func[1], func[2]) if func[0] != "~" else func[2]
+    def walk(func, share, path, seen):
+        path = path + [label(func)]
+        lines[";".join(path)] += stats[func][2] * share
+        for child, edge_ct in callees.get(func, {}).items():
+            child_ct = stats[child][3]
+            if child in seen or child not in stats or child_ct <= 0 or edge_ct * share < PROFILE_MIN_SEC:
+                continue
+            walk(child, share * edge_ct / child_ct, path, seen | {child})
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers and not profiler_frame(func):
+            walk(func, 1.0, [name], {func})
+    return ["%s %d" % (k, round(v * 1e6)) for k, v in lines.items() if round(v * 1e6) > 0]
+
+def write_profile(out_dir):
+    """Write stages.json, scan.collapsed, scan.prof and allocations.txt; print the stage table."""
+    global PROFILE
+    os.makedirs(out_dir, exist_ok=True)
+    stages = {k: {m: round(v, 4) if isinstance(v, float) else v for m, v in st.items()} for k, st in PROFILE["stages"].items()}
+    with open(os.path.join(out_dir, "stages.json"), "w") as f:
+        json.dump(stages, f, indent=2)
+    per_stage = {name: stage_stats(name) for name in PROFILE["stages"]}
+    with open(os.path.join(out_dir, "scan.collapsed"), "w") as f:
+        for name, st in per_stage.items():
+            f.writelines(line + "\n" for line in collapsed_stacks(name, st))
+    pstats.Stats().add(*per_stage.values()).dump_stats(os.path.join(out_dir, "scan.prof"))
+    top = sorted(PROFILE["alloc"].items(), key=lambda x: -x[1][0])[:PROFILE["top_n"]]
+    with open(os.path.join(out_dir, "allocations.txt"), "w") as f:
+        for i, ((name, site, tb), (size, count)) in enumerate(top, 1):
+            f.write("#%d [%s] %s — %.1f KiB in %d blocks\n%s\n\n" % (i, name, site, size / 1024, count, tb))
+    tracemalloc.stop()
+    PROFILE = None
+    print(f"\n🔬 Profile → {out_dir}")
+    print(f"   {'stage':<16}{'calls':>6}{'cpu s':>9}{'wall s':>9}{'peak KiB':>11}")
+    for name, st in sorted(stages.items(), key=lambda x: -x[1]["cpu_sec"]):
+        print(f"   {name:<16}{st['calls']:>6}{st['cpu_sec']:>9.3f}{st['wall_sec']:>9.3f}{st['peak_kb']:>11.1f}")
+
+def fetch_input(inputs, guard, key, src, fn, *args, **kwargs):
+    """Call a fetcher (through the guard when src is set), recording its result under key.
+    With no guard the scan is a replay, and the recorded result is served instead. None means not fetched."""
+    if guard is None:
+        return inputs.get(key)
+    inputs[key] = guarded_fetch(guard, src, fn, *args, **kwargs) if src else fn(*args, **kwargs)
+    return inputs[key]
+
+# ═══ Main scan ═══
+SOURCE_STEPS = {
+    "who": "📡 [1/5] WHO Disease Outbreak News", "news": "🔍 [2/5] News search",
+    "twitter": "🐦 [3/5] Twitter/X", "reddit": "💬 [4/5] Reddit", "trends": "📈 [5/5] Google Trends",
+}
+# source → (guarded upstream, fetcher, result count, processor)
+QUERY_SOURCES = {
+    "news": ("brave", search_web, 5, process_news),
+    "twitter": ("bird", search_bird, 15, process_tweets),
+    "reddit": ("brave", search_web, 5, process_reddit),
+}
+QUERY_POOLS = {"news": NEWS_QUERIES, "twitter": TWITTER_QUERIES, "reddit": REDDIT_QUERIES}
+
+def plan_scan(history, previous):
+    """This scan's queries as (source, query) pairs. Deterministic for a given history, so shards agree on it."""
+    query_stats = history.get("queries", {})
+    hot_terms = hotspot_terms(previous.get("hotspots", []))
+    brave_pool = [("news", q) for q in NEWS_QUERIES] + [("reddit", q) for q in REDDIT_QUERIES]
+    planned = plan_queries(brave_pool, QUERY_BUDGET["brave"], query_stats, hot_terms)
+    planned += plan_queries([("twitter", q) for q in TWITTER_QUERIES], QUERY_BUDGET["bird"], query_stats, hot_terms)
+    return planned
+
+def work_items(planned):
+    """Every fetch of a scan in pipeline order: WHO, news, Twitter, Reddit, Trends."""
+    return [("who", None)] + [p for src in ("news", "twitter", "reddit") for p in planned if p[0] == src] + [("trends", None)]
+
+def collect(work, inputs, guard, shard=(0, 1)):
+    """Fetch and process this shard's share of the work list — every n-th item from i, so each upstream is spread
+    across shards. Returns {work index: (key, signals)} with key "who", "trends" or a query key; queries whose
+    fetch was skipped or failed are left out, so they count as skipped rather than as runs that found nothing."""
+    i, n = shard
+    mine = [(k, w) for k, w in enumerate(work) if k % n == i]
+    results, last_src = {}, None
+    for k, (src, q) in mine:
+        if src != last_src:
+            last_src = src
+            if src in QUERY_POOLS:
+                mine_src = sum(1 for _, w in mine if w[0] == src)
+                print(f"\n{SOURCE_STEPS[src]} ({mine_src}/{len(QUERY_POOLS[src])} queries)...")
+            else:
+                print(f"\n{SOURCE_STEPS[src]}...")
+        if src == "who":
+            with stage("fetch"):
+                who = fetch_input(inputs, guard, "who", "who", fetch_who) or []
+            print(f"   → {len(who)} items")
+            with stage("process_who"):
+                results[k] = ("who", process_who(who))
+        elif src == "trends":
+            with stage("fetch"):
+                results[k] = ("trends", fetch_input(inputs, guard, "trends", None, fetch_google_trends) or [])
+            print(f"   → {len(results[k][1])} signals")
+        else:
+            upstream, fetcher, count, processor = QUERY_SOURCES[src]
+            key = query_key(src, q)
+            with stage("fetch"):
+                raw = fetch_input(inputs, guard, key, upstream, fetcher, q, count=count)
+            if raw is None:
+                continue  # skipped or failed: not a run, so the query's yield and recency stay as they were
+            with stage(processor.__name__):
+                sigs = processor(raw)
+            if sigs:
+                print(f"   '{q}' → {len(sigs)} signals")
+            results[k] = (key, sigs)
+    return results
+
+def finish_scan(results, history, previous, t0, output_file=None, fetch=None, save=True):
+    """Post-process collected results — confidence, dedup, anomalies, hotspots, flight risk — and publish.
+    Runs once over the combined set, whether results came from one process or from merged shards."""
+    output_file = output_file or SIGNALS_FILE
+    all_signals = [s for k in sorted(results) for s in results[k][1]]
+    produced = {key: sigs for key, sigs in results.values() if key not in ("who", "trends")}
+    prev_ids = {s["id"] for s in previous.get("signals", [])}
     
     # Post-processing
     print("\n⚙️  Processing...")
     
     # Compute confidence
-    for s in all_signals:
-        s["confidence"] = compute_confidence(s)
+    with stage("confidence"):
+        for s in all_signals:
+            s["confidence"] = compute_confidence(s)
     
     # Deduplicate
     before = len(all_signals)
-    all_signals = deduplicate(all_signals)
+    with stage("dedup"):
+        all_signals = deduplicate(all_signals)
+        # Sort by severity × confidence
+        all_signals.sort(key=lambda x: -(x["severity"] * x["confidence"]))
     print(f"   Dedup: {before} → {len(all_signals)}")
     
-    # Sort by severity × confidence
-    all_signals.sort(key=lambda x: -(x["severity"] * x["confidence"]))
-    
     # Anomaly detection
-    history = load_history()
-    all_signals = detect_anomalies(all_signals, history)
+    with stage("anomalies"):
+        all_signals = detect_anomalies(all_signals, history)
     anomalies = sum(1 for s in all_signals if s.get("anomaly"))
     print(f"   Anomalies: {anomalies}")
     
+    # Query yield
+    update_query_stats(history.setdefault("queries", {}), produced, all_signals, prev_ids)
+    
     # Hotspots
-    hotspots = compute_hotspots(all_signals)
+    with stage("hotspots"):
+        hotspots = compute_hotspots(all_signals)
     
     # Flight risk routes
-    flight_routes = compute_flight_risk(hotspots)
+    with stage("flight_risk"):
+        flight_routes = compute_flight_risk(hotspots)
     print(f"   Flight risk routes: {len(flight_routes)}")
     
+    # Alerts (live scans only — replays must not notify anyone); a failure here must not block publishing
+    scan_time = datetime.now(timezone.utc).isoformat()
+    alerts = None
+    if save:
+        try:
+            with stage("alerts"):
+                alerts = dispatch_alerts(all_signals, hotspots, previous, scan_time, history)
+        except Exception as e:
+            print(f"  [!] Alert dispatch failed: {e}", file=sys.stderr)
+        if alerts:
+            print(f"   Alerts: {alerts['sent']} sent to {alerts['subscribers']} subscribers ({alerts['matched']} matches, {alerts['rules']} rules)")
+    
     # Stats
     traveler_count = sum(1 for s in all_signals if s.get("is_traveler"))
     stats = {
@@ -772,38 +1325,46 @@ def run_scan():
         "countries_affected": len(hotspots),
         "traveler_signals": traveler_count,
         "anomalies_detected": anomalies,
+        "queries_run": len(produced),
+        "queries_skipped": sum(len(p) for p in QUERY_POOLS.values()) - len(produced),
         "scan_duration_sec": round(time.time() - t0, 1),
     }
+    if fetch:
+        stats["fetch"] = fetch
+    if alerts:
+        stats["alerts"] = alerts
     for s in all_signals:
         stats["by_source"][s["source"]] = stats["by_source"].get(s["source"], 0) + 1
         stats["by_category"][s["category"]] = stats["by_category"].get(s["category"], 0) + 1
         stats["by_type"][s["type"]] = stats["by_type"].get(s["type"], 0) + 1
         r = s["location"].get("region", "Unknown")
         stats["by_region"][r] = stats["by_region"].get(r, 0) + 1
-        if s["severity"] >= 8: stats["by_severity"]["critical"] += 1
-        elif s["severity"] >= 6: stats["by_severity"]["high"] += 1
-        elif s["severity"] >= 4: stats["by_severity"]["moderate"] += 1
-        else: stats["by_severity"]["low"] += 1
+        stats["by_severity"][severity_bucket(s["severity"])] += 1
     
     # Save
-    output = {
-        "version": "2.0",
-        "lastScan": datetime.now(timezone.utc).isoformat(),
-        "scanDuration": stats["scan_duration_sec"],
-        "signals": all_signals,
-        "hotspots": hotspots,
-        "flightRoutes": flight_routes,
-        "stats": stats,
-    }
-    
-    os.makedirs(os.path.dirname(SIGNALS_FILE), exist_ok=True)
-    with open(SIGNALS_FILE, "w") as f:
-        json.dump(output, f, indent=2)
-    
-    # Update history
-    history["scans"].append({"time": output["lastScan"], "signals": len(all_signals), "hotspots": len(hotspots)})
-    history["scans"] = history["scans"][-30:]  # keep last 30
-    save_history(history)
+    with stage("serialization"):
+        output = {
+            "version": "2.0",
+            "lastScan": scan_time,
+            "scanDuration": stats["scan_duration_sec"],
+            "signals": all_signals,
+            "hotspots": hotspots,
+            "flightRoutes": flight_routes,
+            "regions": compute_region_rollups(hotspots),
+            "indexes": build_indexes(all_signals),
+            "stats": stats,
+        }
+        
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        with open(output_file + ".tmp", "w") as f:
+            json.dump(output, f, indent=2)
+        os.replace(output_file + ".tmp", output_file)  # atomic publish for readers such as geo_query.py
+        
+        # Update history
+        if save:
+            history["scans"].append({"time": output["lastScan"], "signals": len(all_signals), "hotspots": len(hotspots)})
+            history["scans"] = history["scans"][-30:]  # keep last 30
+            save_history(history)
     
     elapsed = round(time.time() - t0, 1)
     print(f"\n{'=' * 60}")
@@ -812,7 +1373,202 @@ def run_scan():
     print(f"   🔴 Critical: {stats['by_severity']['critical']} | 🟠 High: {stats['by_severity']['high']} | 🟡 Moderate: {stats['by_severity']['moderate']} | 🟢 Low: {stats['by_severity']['low']}")
     print(f"   ✈️  Traveler signals: {traveler_count} | ⚠️  Anomalies: {anomalies}")
     print(f"   Sources: {', '.join(stats['by_source'].keys())}")
+    if output_file != SIGNALS_FILE:
+        print(f"   Output: {output_file}")
     print(f"{'=' * 60}")
 
+def _start(replay, shards=1):
+    """Inputs, fetch guard and query plan for a live scan or a replay of recorded inputs."""
+    if replay is not None:
+        return replay, None, [tuple(p) for p in replay.get("planned", [])]
+    return {}, new_fetch_guard(shards=shards), None
+
+def _record(inputs, record):
+    if record:
+        with open(record, "w") as f:
+            json.dump(inputs, f)
+        print(f"\n💾 Inputs recorded → {record}")
+
+def run_scan(replay=None, record=None, output_file=None):
+    """Full scan in one process. replay: recorded inputs to use instead of the network (history is then left
+    untouched); record: path to save this scan's raw inputs for later replay; output_file: override SIGNALS_FILE."""
+    t0 = time.time()
+    print("=" * 60)
+    print("🛰️  GeoSentinel 2.0 Scanner v2 — Full Spectrum Scan" + (" (replay)" if replay is not None else ""))
+    print("=" * 60)
+    
+    history, previous = load_history(), load_previous_output()
+    inputs, guard, planned = _start(replay)
+    if planned is None:
+        planned = inputs["planned"] = plan_scan(history, previous)
+    results = collect(work_items(planned), inputs, guard)
+    _record(inputs, record)
+    finish_scan(results, history, previous, t0, output_file, fetch_stats(guard) if guard else None, save=replay is None)
+
+# ═══ Sharded scans ═══
+def collect_shard(shard, replay=None):
+    """Fetch and process one shard (i, n) of the scan; returns its mergeable partial result and raw inputs."""
+    t0 = time.time()
+    print(f"🛰️  Shard {shard[0] + 1}/{shard[1]}" + (" (replay)" if replay is not None else ""))
+    history, previous = load_history(), load_previous_output()
+    inputs, guard, planned = _start(replay, shard[1])
+    if planned is None:
+        planned = inputs["planned"] = plan_scan(history, previous)
+    results = collect(work_items(planned), inputs, guard, shard)
+    return {
+        "version": "2.0-partial",
+        "shard": list(shard),
+        "started": t0,
+        "results": {str(k): {"key": key, "signals": sigs} for k, (key, sigs) in results.items()},
+        "fetch": fetch_stats(guard) if guard else None,
+    }, inputs
+
+def run_shard(shard, replay=None, record=None):
+    """Fetch and process one shard (i, n) of the scan and return its mergeable partial result."""
+    partial, inputs = collect_shard(shard, replay)
+    _record(inputs, record)
+    return partial
+
+def run_worker(shard, replay=None, profile=False):
+    """collect_shard in a worker process. Its inputs and, with profile, its stage data go back to the parent,
+    which records and reports them for the scan as a whole."""
+    if profile:
+        start_profile()
+    partial, inputs = collect_shard(shard, replay)
+    return partial, inputs, profile_snapshot() if profile else None
+
+BREAKER_RANK = {"closed": 0, "half-open": 1, "open": 2}
+
+def merge_fetch_stats(partials):
+    """Sum per-source fetch counters across shards; a source reports its worst breaker state."""
+    merged = {}
+    for p in partials:
+        for src, st in (p.get("fetch") or {}).items():
+            m = merged.setdefault(src, {"state": "closed", "calls": 0, "errors": 0, "retries": 0, "skipped": 0,
+                                        "spent_sec": 0.0, "budget_sec": 0.0, "transitions": []})
+            for k in ("calls", "errors", "retries", "skipped"):
+                m[k] += st[k]
+            for k in ("spent_sec", "budget_sec"):
+                m[k] = round(m[k] + st[k], 1)
+            if BREAKER_RANK[st["state"]] > BREAKER_RANK[m["state"]]:
+                m["state"] = st["state"]
+            m["transitions"] += [dict(t, shard=p["shard"][0]) for t in st["transitions"]]
+    return merged
+
+def shard_set_problem(partials):
+    """Why the partials aren't exactly shards 0..N-1 of one N-way scan, or None."""
+    counts = {p["shard"][1] for p in partials}
+    if len(counts) != 1:
+        return "partials come from different shard counts %s" % sorted(counts)
+    n = counts.pop()
+    seen = [p["shard"][0] for p in partials]
+    if len(seen) != len(set(seen)):
+        return "duplicate shards %s" % sorted({i for i in seen if seen.count(i) > 1})
+    if set(seen) != set(range(n)):
+        return "missing shards %s of %d" % (sorted(set(range(n)) - set(seen)), n)
+    return None
+
+def merge_partials(partials):
+    """Combine shard partials into {work index: (key, signals)}, i.e. the same shape and order as a
+    single-process collect(), plus merged fetch stats and the earliest shard start."""
+    problem = shard_set_problem(partials)
+    if problem:
+        print(f"  [!] Merging an incomplete shard set: {problem}", file=sys.stderr)
+    results = {}
+    for p in partials:
+        for k, r in p["results"].items():
+            results[int(k)] = (r["key"], r["signals"])
+    return results, merge_fetch_stats(partials), min(p["started"] for p in partials)
+
+def run_merge(partials, output_file=None):
+    """Run the post-processing once over merged shard results and publish."""
+    print("=" * 60)
+    print(f"🛰️  GeoSentinel 2.0 Scanner v2 — Merging {len(partials)} shards")
+    print("=" * 60)
+    results, fetch, t0 = merge_partials(partials)
+    replayed = any(p.get("fetch") is None for p in partials)
+    finish_scan(results, load_history(), load_previous_output(), t0, output_file, fetch or None, save=not replayed)
+
+def run_workers(workers, replay=None, record=None, output_file=None):
+    """Sharded scan on local worker processes, merged in this one. Shard inputs are recorded as one file,
+    and while --profile is active the workers' stage data is folded into this process's report."""
+    shards = [(i, workers) for i in range(workers)]
+    with ProcessPoolExecutor(workers) as pool:
+        done = list(pool.map(run_worker, shards, [replay] * workers, [PROFILE is not None] * workers))
+    inputs = {} if replay is None else replay
+    for _, shard_inputs, snap in done:
+        if replay is None:
+            inputs.update(shard_inputs)
+        if snap:
+            merge_profile(snap)
+    _record(inputs, record)
+    run_merge([p for p, _, _ in done], output_file)
+
+def parse_shard(text):
+    try:
+        i, n = (int(x) for x in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected I/N, e.g. 0/4")
+    if not 0 <= i < n:
+        raise argparse.ArgumentTypeError("shard index must be in 0..N-1")
+    return i, n
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="GeoSentinel 2.0 multi-source disease surveillance scanner")
+    ap.add_argument("--profile", metavar="DIR", nargs="?", const="profile",
+                    help="profile each pipeline stage (cProfile + tracemalloc) and write reports to DIR (default: profile/)")
+    ap.add_argument("--top", type=int, default=25, help="allocation sites listed in the --profile report")
+    ap.add_argument("--record", metavar="FILE", help="save this scan's raw source responses for --replay")
+    ap.add_argument("--replay", metavar="FILE", help="rerun the pipeline on recorded inputs instead of fetching")
+    ap.add_argument("--output", metavar="FILE",
+                    help="where to write signals.json (replays default to replay/signals.json, or DIR/ under --profile)")
+    ap.add_argument("--workers", type=int, metavar="N", help="split the scan across N local worker processes")
+    ap.add_argument("--shard", type=parse_shard, metavar="I/N",
+                    help="run only shard I of N (0-based) and write a partial result, e.g. for a CI matrix job")
+    ap.add_argument("--partial", metavar="FILE", help="where --shard writes its partial (default: partial-I-of-N.json)")
+    ap.add_argument("--merge", nargs="+", metavar="FILE", help="merge shard partials, post-process once, and publish")
+    ap.add_argument("--allow-partial", action="store_true",
+                    help="let --merge publish even if shards are missing, duplicated or from different N")
+    args = ap.parse_args(argv)
+    if sum(bool(x) for x in (args.workers, args.shard, args.merge)) > 1:
+        ap.error("--workers, --shard and --merge are mutually exclusive")
+    if args.workers is not None and args.workers < 1:
+        ap.error("--workers must be at least 1")
+    
+    replay = None
+    if args.replay:
+        with open(args.replay) as f:
+            replay = json.load(f)
+    partials = []
+    for path in args.merge or []:
+        with open(path) as f:
+            partials.append(json.load(f))
+    if partials and not args.allow_partial:
+        problem = shard_set_problem(partials)
+        if problem:
+            ap.error("refusing to merge: %s (use --allow-partial to publish anyway)" % problem)
+    replayed = replay is not None or any(p.get("fetch") is None for p in partials)
+    output_file = args.output
+    if replayed:
+        output_file = output_file or (os.path.join(args.profile, "signals.json") if args.profile else REPLAY_FILE)
+        if os.path.abspath(output_file) == os.path.abspath(SIGNALS_FILE):
+            ap.error("a replay must not overwrite the published %s; choose another --output" % SIGNALS_FILE)
+    if args.profile:
+        start_profile(args.top)
+    if args.shard:
+        partial = run_shard(args.shard, replay=replay, record=args.record)
+        path = args.partial or "partial-%d-of-%d.json" % args.shard
+        with open(path, "w") as f:
+            json.dump(partial, f)
+        print(f"\n🧩 Partial → {path}")
+    elif args.merge:
+        run_merge(partials, output_file)
+    elif args.workers:
+        run_workers(args.workers, replay=replay, record=args.record, output_file=output_file)
+    else:
+        run_scan(replay=replay, record=args.record, output_file=output_file)
+    if args.profile:
+        write_profile(args.profile)
+
 if __name__ == "__main__":
-    run_scan()
+    main()